@@ -345,7 +345,7 @@ Remember: You're not just classifying intent - you're having an intelligent conv
             from core.supabase_rest import supabase_rest
             
             # Load rolling summary and followup state
-            summary_q = supabase_rest.table('conversation_summaries').select('*').eq('user_id', user_id).limit(1).execute()
+            summary_q = await supabase_rest.table('conversation_summaries').select('*').eq('user_id', user_id).limit(1).aexecute()
             conversation_summary = ""
             awaiting_followup = False
             followup_context = {}
@@ -356,7 +356,7 @@ Remember: You're not just classifying intent - you're having an intelligent conv
                 followup_context = row.get('followup_context') or {}
 
             # Load some recent messages for context if needed (optional)
-            hist_q = supabase_rest.table('conversation_history').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(6).execute()
+            hist_q = await supabase_rest.table('conversation_history').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(6).aexecute()
             recent_messages: List[Dict] = []
             if hist_q.get('data'):
                 # reverse to chronological order
@@ -418,15 +418,15 @@ Remember: You're not just classifying intent - you're having an intelligent conv
                 'content': response.text,
                 'intent': response.intent
             }
-            supabase_rest.table('conversation_history').insert(user_row).execute()
-            supabase_rest.table('conversation_history').insert(ai_row).execute()
+            await supabase_rest.table('conversation_history').insert(user_row).aexecute()
+            await supabase_rest.table('conversation_history').insert(ai_row).aexecute()
 
             # Update rolling summary (keep concise)
             updated_summary = self._summarize_recent(context)
             context.conversation_summary = updated_summary
 
             # Upsert conversation_summaries (manual upsert: try update, else insert)
-            existing = supabase_rest.table('conversation_summaries').select('*').eq('user_id', user_id).limit(1).execute()
+            existing = await supabase_rest.table('conversation_summaries').select('*').eq('user_id', user_id).limit(1).aexecute()
             summary_payload = {
                 'user_id': user_id,
                 'conversation_id': 'default',
@@ -435,9 +435,9 @@ Remember: You're not just classifying intent - you're having an intelligent conv
                 'followup_context': context.followup_context or {}
             }
             if existing.get('data'):
-                supabase_rest.table('conversation_summaries').update(summary_payload).eq('user_id', user_id).execute()
+                await supabase_rest.table('conversation_summaries').update(summary_payload).eq('user_id', user_id).aexecute()
             else:
-                supabase_rest.table('conversation_summaries').insert(summary_payload).execute()
+                await supabase_rest.table('conversation_summaries').insert(summary_payload).aexecute()
 
             logger.info(f"💬 Conversation: {user_id} -> {response.intent}")
         except Exception as e:
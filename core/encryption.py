@@ -9,6 +9,7 @@ Each user gets a unique encryption key for their sensitive data.
 import os
 import base64
 import logging
+import functools
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -16,6 +17,23 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# PBKDF2 with 100k iterations dominates every encrypt/decrypt, and its result only
+# depends on (master key, user_id), so each user's Fernet is derived once
+@functools.lru_cache(maxsize=1024)
+def _fernet_for(master_key: bytes, user_id: str) -> Fernet:
+    # Use user_id as salt for key derivation
+    salt = user_id.encode('utf-8').ljust(16, b'0')[:16]
+    
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    
+    key = base64.urlsafe_b64encode(kdf.derive(master_key))
+    return Fernet(key)
+
 class UserEncryption:
     """Handles per-user encryption for sensitive data like stored tokens."""
     
@@ -51,19 +69,8 @@ class UserEncryption:
         return master_key
     
     def _derive_user_key(self, user_id: str) -> Fernet:
-        """Derive a unique encryption key for a specific user."""
-        # Use user_id as salt for key derivation
-        salt = str(user_id).encode('utf-8').ljust(16, b'0')[:16]
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        
-        key = base64.urlsafe_b64encode(kdf.derive(self.master_key))
-        return Fernet(key)
+        """Derive a unique encryption key for a specific user (cached, see _fernet_for)."""
+        return _fernet_for(self.master_key, str(user_id))
     
     def encrypt_token(self, user_id: str, token: str) -> str:
         """Encrypt a token for a specific user."""
@@ -107,6 +114,10 @@ def decrypt_user_token(user_id: str, encrypted_token: str) -> Optional[str]:
     """Convenience function to decrypt a user token."""
     return encryption.decrypt_token(user_id, encrypted_token)
 
+def forget_user_keys() -> None:
+    """Drop cached derived keys (e.g. after a user is deactivated)."""
+    _fernet_for.cache_clear()
+
 def test_user_encryption(user_id: str) -> bool:
     """Convenience function to test encryption for a user."""
     return encryption.test_encryption(user_id)
@@ -12,6 +12,7 @@ This module provides intelligent notification scheduling:
 
 import os
 import json
+import orjson
 import logging
 import asyncio
 import random
@@ -60,6 +61,8 @@ class NotificationScheduler:
         self._in_memory_timers: Dict[str, asyncio.Task] = {}
         # In-process lock to prevent duplicate sends (poller vs precise timer)
         self._sending_ids: Set[str] = set()
+        # Pooled Telegram client; main.py hands over its shared client at startup
+        self.http_client = None
         
         # Initialize scheduler if available
         if SCHEDULER_AVAILABLE:
@@ -161,7 +164,7 @@ class NotificationScheduler:
                 # Double-check not already sent in DB
                 try:
                     from core.supabase_rest import supabase_rest
-                    res = supabase_rest.table('notifications').select().eq('id', notification.id).execute()
+                    res = await supabase_rest.table('notifications').select().eq('id', notification.id).aexecute()
                     if res and res.get('error') is None and res.get('data'):
                         row = res['data'][0]
                         if row.get('is_sent') is True:
@@ -302,7 +305,7 @@ class NotificationScheduler:
             # Ensure not already sent in DB (race guard)
             try:
                 from core.supabase_rest import supabase_rest
-                check = supabase_rest.table('notifications').select('*').eq('id', notification.id).limit(1).execute()
+                check = await supabase_rest.table('notifications').select('*').eq('id', notification.id).limit(1).aexecute()
                 if check and check.get('error') is None and check.get('data'):
                     if check['data'][0].get('is_sent') is True:
                         return
@@ -363,28 +366,31 @@ class NotificationScheduler:
             
             api_url = f"https://api.telegram.org/bot{telegram_token}"
             
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "chat_id": chat_id,
-                    "text": text
-                }
-                if parse_mode:
-                    payload["parse_mode"] = parse_mode
-                    
-                response = await client.post(f"{api_url}/sendMessage", json=payload)
+            client = self.http_client
+            if client is None:
+                client = self.http_client = httpx.AsyncClient(timeout=10.0)
+            payload = {
+                "chat_id": chat_id,
+                "text": text
+            }
+            if parse_mode:
+                payload["parse_mode"] = parse_mode
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    ok = bool(data.get('ok'))
-                    if ok:
-                        logger.info(f"📤 Telegram message sent successfully to {chat_id}")
-                        return True
-                    else:
-                        logger.error(f"❌ Telegram API response not ok: {data}")
-                        return False
+            response = await client.post(f"{api_url}/sendMessage", content=orjson.dumps(payload),
+                                         headers={"content-type": "application/json"})
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                ok = bool(data.get('ok'))
+                if ok:
+                    logger.info(f"📤 Telegram message sent successfully to {chat_id}")
+                    return True
                 else:
-                    logger.error(f"❌ Telegram API error: {response.status_code} - {response.text}")
+                    logger.error(f"❌ Telegram API response not ok: {data}")
                     return False
+            else:
+                logger.error(f"❌ Telegram API error: {response.status_code} - {response.text}")
+                return False
                     
         except Exception as e:
             logger.error(f"❌ Error sending Telegram message: {e}")
@@ -396,9 +402,9 @@ class NotificationScheduler:
         if notification.notification_type == 'reminder':
             # Render in user's local timezone and simplify title
             try:
-                from core.user_prefs import get_user_timezone
+                from core.user_prefs import aget_user_timezone
                 import pytz
-                user_tz_name = get_user_timezone(notification.user_id)
+                user_tz_name = await aget_user_timezone(notification.user_id)
                 tz = pytz.timezone(user_tz_name)
                 local_dt = notification.scheduled_time.astimezone(tz) if notification.scheduled_time.tzinfo else tz.localize(notification.scheduled_time)
                 # Clean message: drop trailing "at HH:MM ..." patterns
@@ -705,7 +711,7 @@ class NotificationScheduler:
                 'created_at': datetime.now(timezone.utc).isoformat()
             }
             
-            response = supabase_rest.table('notifications').insert(notification_data).execute()
+            response = await supabase_rest.table('notifications').insert(notification_data).aexecute()
 
             # Debug: Log the full response to see what's happening
             logger.info(f"🔍 DEBUG: Supabase response: {response}")
@@ -730,7 +736,7 @@ class NotificationScheduler:
             from datetime import datetime, timezone
             
             # Get all pending notifications (time filtering handled by poller)
-            response = supabase_rest.table('notifications').select().eq('is_sent', False).eq('is_active', True).order('scheduled_time').limit(200).execute()
+            response = await supabase_rest.table('notifications').select().eq('is_sent', False).eq('is_active', True).order('scheduled_time').limit(200).aexecute()
             
             if response and response.get('error') is None and response.get('data'):
                 logger.info(f"🔍 Found {len(response['data'])} pending active notifications")
@@ -750,10 +756,10 @@ class NotificationScheduler:
             from datetime import datetime, timezone
             
             # Update notification status to 'sent'
-            response = supabase_rest.table('notifications').update({
+            response = await supabase_rest.table('notifications').update({
                 'is_sent': True,
                 'sent_at': datetime.now(timezone.utc).isoformat()
-            }).eq('id', notification_id).execute()
+            }).eq('id', notification_id).aexecute()
             
             if response and response.get('error') is None:
                 logger.info(f"✅ Marked notification {notification_id} as sent")
@@ -767,7 +773,7 @@ class NotificationScheduler:
         """Get users who want morning briefings (basic: all active users, default Asia/Kolkata)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('users').select('*').eq('is_active', True).limit(500).execute()
+            res = await supabase_rest.table('users').select('*').eq('is_active', True).limit(500).aexecute()
             users = []
             if res and res.get('error') is None and res.get('data'):
                 for row in res['data']:
@@ -785,7 +791,7 @@ class NotificationScheduler:
         """Get users who want evening summaries (basic: all active users)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('users').select('*').eq('is_active', True).limit(500).execute()
+            res = await supabase_rest.table('users').select('*').eq('is_active', True).limit(500).aexecute()
             users = []
             if res and res.get('error') is None and res.get('data'):
                 for row in res['data']:
@@ -799,7 +805,7 @@ class NotificationScheduler:
         """Get all active users (basic)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('users').select('*').eq('is_active', True).limit(500).execute()
+            res = await supabase_rest.table('users').select('*').eq('is_active', True).limit(500).aexecute()
             if res and res.get('error') is None and res.get('data'):
                 return [{'user_id': str(r['user_id'])} for r in res['data']]
             return []
@@ -811,7 +817,7 @@ class NotificationScheduler:
         """Get summary of user's tasks (basic counts)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('content').select('*').eq('user_id', user_id).eq('content_type', 'task').execute()
+            res = await supabase_rest.table('content').select('*').eq('user_id', user_id).eq('content_type', 'task').aexecute()
             if res and res.get('error') is None and res.get('data') is not None:
                 total = len(res['data'])
                 if total:
@@ -825,7 +831,7 @@ class NotificationScheduler:
         """Get summary of recent content (last 5 items)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(5).execute()
+            res = await supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(5).aexecute()
             if res and res.get('error') is None and res.get('data'):
                 titles = []
                 for r in res['data']:
@@ -843,7 +849,7 @@ class NotificationScheduler:
         try:
             from core.supabase_rest import supabase_rest
             # Assuming content.created_at is ISO; filter client-side basic
-            res = supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(100).execute()
+            res = await supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(100).aexecute()
             saves = 0
             if res and res.get('error') is None and res.get('data'):
                 from datetime import datetime
@@ -868,7 +874,7 @@ class NotificationScheduler:
         """Get content highlights for the day (basic: latest 3 titles)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(3).execute()
+            res = await supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(3).aexecute()
             if res and res.get('error') is None and res.get('data'):
                 lines = []
                 for r in res['data']:
@@ -899,7 +905,7 @@ class NotificationScheduler:
         """Get a random older piece of content (basic heuristic)."""
         try:
             from core.supabase_rest import supabase_rest
-            res = supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(200).execute()
+            res = await supabase_rest.table('content').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(200).aexecute()
             if res and res.get('error') is None and res.get('data'):
                 items = res['data']
                 if len(items) == 0:
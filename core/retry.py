@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+🔁 Database Retry Helper for MySecondMind
+
+Retries Supabase calls that fail for transient reasons (rate limiting,
+gateway errors, dropped connections) with jittered exponential backoff,
+instead of failing the whole operation on a single blip.
+"""
+
+import time
+import random
+import logging
+from typing import Callable, Optional, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limited or upstream temporarily unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _status_of(exc: Exception) -> Optional[int]:
+    """HTTP status carried by an httpx or postgrest error, if any."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    # postgrest's APIError reports the HTTP status as its code when the body isn't JSON
+    code = getattr(exc, "code", None)
+    if isinstance(code, str) and code.isdigit():
+        return int(code)
+    return None
+
+
+def is_transient(exc: Exception) -> bool:
+    """Whether a failed call is worth retrying."""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    return _status_of(exc) in RETRY_STATUSES
+
+
+def retry_db(fn: Callable[[], T], max_retries: int = 6, base: float = 0.2, cap: float = 10.0) -> T:
+    """Call fn(), retrying transient failures with jittered exponential backoff.
+
+    Only use for idempotent operations (reads, upserts, absolute updates). The sleeps
+    block the calling thread, so pass a small max_retries on paths a user is waiting on.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries or not is_transient(e):
+                raise
+            delay = min(cap, base * 2 ** attempt) + random.random() * 0.1
+            logger.warning(f"⚠️ Transient database error ({e}), retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+            time.sleep(delay)
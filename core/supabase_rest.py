@@ -7,8 +7,12 @@ the Python client library version conflicts.
 """
 
 import os
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
 import logging
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
@@ -16,6 +20,10 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+def _dumps(data: Any) -> bytes:
+    """orjson encoding for request bodies (the session already sends Content-Type: application/json)."""
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
 class SupabaseRestClient:
     """Simple REST client for Supabase operations."""
     
@@ -39,6 +47,15 @@ class SupabaseRestClient:
             # Ask PostgREST to return affected rows for mutations
             'Prefer': 'return=representation'
         }
+        # One keep-alive session for every query instead of a new TCP/TLS connection per request;
+        # only connection failures are retried, so a write is never sent twice
+        pool_size = int(os.getenv('SUPABASE_MAX_CONNECTIONS', 20))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.2))
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.ready = True
         logger.info("✅ Supabase REST client initialized")
         if service_key:
@@ -162,20 +179,21 @@ class SupabaseQuery:
         params = self._build_params()
         
         try:
+            session = self.table.client.session
             if self.method == 'GET':
-                response = requests.get(url, headers=self.table.client.headers, params=params, timeout=10)
+                response = session.get(url, params=params, timeout=10)
             elif self.method == 'POST':
-                response = requests.post(url, headers=self.table.client.headers, json=self.data, params=params, timeout=10)
+                response = session.post(url, data=_dumps(self.data), params=params, timeout=10)
             elif self.method == 'PATCH':
-                response = requests.patch(url, headers=self.table.client.headers, json=self.data, params=params, timeout=10)
+                response = session.patch(url, data=_dumps(self.data), params=params, timeout=10)
             elif self.method == 'DELETE':
-                response = requests.delete(url, headers=self.table.client.headers, params=params, timeout=10)
+                response = session.delete(url, params=params, timeout=10)
             else:
                 return {"data": None, "error": f"Unsupported method: {self.method}"}
             
             # Supabase PostgREST returns 200 with body for mutations when Prefer return=representation
             if response.status_code in [200, 201]:
-                data = response.json() if response.content else []
+                data = orjson.loads(response.content) if response.content else []
                 return {"data": data, "error": None}
             elif response.status_code == 204:
                 # No content returned (e.g., delete without representation)
@@ -187,5 +205,9 @@ class SupabaseQuery:
             logger.error(f"❌ Query failed: {e}")
             return {"data": None, "error": str(e)}
 
+    async def aexecute(self) -> Dict:
+        """execute() in a worker thread, for callers running on the event loop."""
+        return await asyncio.to_thread(self.execute)
+
 # Create global client instance
 supabase_rest = SupabaseRestClient()
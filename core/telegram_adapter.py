@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+🔌 Telegram Update Adapter for MySecondMind
+
+The webhook receives raw Telegram JSON, while the handlers in handlers/ are
+written against python-telegram-bot's Update/Context objects. The pydantic
+models below validate the incoming payload; the Mock* stand-ins expose just
+the attributes the handlers use.
+"""
+
+import functools
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# --- Incoming webhook payload (unknown fields are ignored) ---
+class TelegramUser(BaseModel):
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+class TelegramChat(BaseModel):
+    id: int
+
+
+class TelegramMessage(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    chat: TelegramChat
+    from_: TelegramUser = Field(alias="from")
+    text: Optional[str] = None
+
+
+class TelegramUpdate(BaseModel):
+    message: Optional[TelegramMessage] = None
+
+
+# --- Handler-facing stand-ins for python-telegram-bot objects ---
+@dataclass(slots=True, frozen=True)
+class MockUser:
+    """Subset of telegram.User used by the handlers; frozen because get_mock_user shares instances."""
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+@dataclass(slots=True)
+class MockMessage:
+    """Subset of telegram.Message; replies go through the injected send coroutine."""
+    text: str
+    chat_id: int
+    send: Callable[..., Awaitable[Any]]
+    from_user: Optional[MockUser] = None
+
+    async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
+        await self.send(self.chat_id, response, parse_mode)
+
+
+@dataclass(slots=True)
+class MockUpdate:
+    """Subset of telegram.Update."""
+    message: MockMessage
+    effective_user: MockUser
+
+
+@dataclass(slots=True)
+class MockContext:
+    """Subset of telegram.ext.CallbackContext."""
+    args: List[str]
+
+
+# Back-to-back messages from one sender share a (frozen) MockUser
+@functools.lru_cache(maxsize=512)
+def get_mock_user(user_id: int, username: Optional[str] = None,
+                  first_name: Optional[str] = None, last_name: Optional[str] = None) -> MockUser:
+    return MockUser(user_id, username, first_name, last_name)
+
+
+def build_update(text: str, chat_id: int, send: Callable[..., Awaitable[Any]], user_id: int,
+                 username: Optional[str] = None, first_name: Optional[str] = None,
+                 last_name: Optional[str] = None) -> MockUpdate:
+    """Build a MockUpdate for one incoming message."""
+    user = get_mock_user(user_id, username, first_name, last_name)
+    return MockUpdate(MockMessage(text, chat_id, send, user), user)
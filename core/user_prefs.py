@@ -5,6 +5,7 @@
 Simple helpers to get/set a user's timezone in Supabase. Falls back to Asia/Kolkata.
 """
 
+import asyncio
 import logging
 from typing import Optional
 
@@ -53,4 +54,12 @@ def set_user_timezone(user_id: str, tz_name: str) -> bool:
         logger.error(f"set_user_timezone failed: {e}")
         return False
 
+# Async variants for the bot's handlers: the REST client is synchronous,
+# so the lookups run in a worker thread instead of blocking the event loop
+async def aget_user_timezone(user_id: str) -> str:
+    return await asyncio.to_thread(get_user_timezone, user_id)
+
+async def aset_user_timezone(user_id: str, tz_name: str) -> bool:
+    return await asyncio.to_thread(set_user_timezone, user_id, tz_name)
+
 
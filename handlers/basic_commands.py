@@ -7,14 +7,14 @@ Handles /start, /help, and /status commands.
 from telegram import Update
 from telegram.ext import ContextTypes
 import os
-from core.user_prefs import set_user_timezone, get_user_timezone
+from core.user_prefs import aset_user_timezone, aget_user_timezone
 
 async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /start command."""
     
     user = update.effective_user
     user_id = str(user.id)
-    tz = get_user_timezone(user_id)
+    tz = await aget_user_timezone(user_id)
     llm_primary = (os.getenv('LLM_PRIMARY') or 'GROQ').upper()
     llm_fallback = (os.getenv('LLM_FALLBACK') or 'GROQ').upper()
     # Check if user has any content to personalize examples
@@ -26,6 +26,8 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass
     
+    suggestion = ("Try: /notes or /tasks to see your recent items" if has_content
+                  else "Try: say \"I learned that Supabase is awesome\" or \"Remind me to call mom tomorrow\"")
     welcome_message = f"""
     🧠 **Welcome to MySecondMind, {user.first_name}!**
     
@@ -46,7 +48,7 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     • `/timezone Asia/Kolkata` to set time zone
     • `/help` to see everything I can do
     
-    {"Try: /notes or /tasks to see your recent items" if has_content else "Try: say \"I learned that Supabase is awesome\" or \"Remind me to call mom tomorrow\""}
+    {suggestion}
     """
     
     await update.message.reply_text(welcome_message, parse_mode='Markdown')
@@ -56,7 +58,7 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     user = update.effective_user
     user_id = str(user.id)
-    tz = get_user_timezone(user_id)
+    tz = await aget_user_timezone(user_id)
     llm_primary = (os.getenv('LLM_PRIMARY') or 'GROQ').upper()
     llm_fallback = (os.getenv('LLM_FALLBACK') or 'GROQ').upper()
     has_content = False
@@ -67,6 +69,8 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass
 
+    tips = ("• Try /notes to review recent items\n• Ask: \"what did I save about apples\"" if has_content
+            else "• Start with a note or task\n• Ask me: \"how do I save a link?\"")
     help_message = f"""
     🆘 **Help & Commands**
     
@@ -91,7 +95,7 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     • "complete 2" to mark a task done
     
     **Tips**
-    {"• Try /notes to review recent items\n• Ask: \"what did I save about apples\"" if has_content else "• Start with a note or task\n• Ask me: \"how do I save a link?\""}
+    {tips}
     
     I’ll adapt responses to your history and preferences.
     """
@@ -136,7 +140,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(
             f"❌ **Status Check Failed**\n\n"
-            f"Error: `{str(e)}`\n\n"
+            f"Error: `{e}`\n\n"
             f"Please check your bot configuration.",
             parse_mode='Markdown'
         )
@@ -148,7 +152,7 @@ async def timezone_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Usage: /timezone Asia/Kolkata")
         return
     tz_name = " ".join(context.args).strip()
-    ok = set_user_timezone(user_id, tz_name)
+    ok = await aset_user_timezone(user_id, tz_name)
     if ok:
         await update.message.reply_text(f"✅ Timezone set to {tz_name}")
     else:
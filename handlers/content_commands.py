@@ -8,6 +8,8 @@ This module provides Telegram commands to view, search, and manage saved content
 import logging
 from typing import Dict, List, Optional
 
+from handlers.content_management import content_manager
+
 logger = logging.getLogger(__name__)
 
 async def view_notes_command(update, context) -> None:
@@ -425,7 +427,6 @@ async def delete_command(update, context) -> None:
     
     parts = context.args
     message = "delete " + " ".join(parts)
-    from handlers.content_management import content_manager
     result = await content_manager.handle_management_command(user_id, message)
     if result.get('success'):
         await update.message.reply_text(result['message'])
@@ -445,7 +446,6 @@ async def complete_command(update, context) -> None:
     
     parts = context.args
     message = "complete " + " ".join(parts)
-    from handlers.content_management import content_manager
     result = await content_manager.handle_management_command(user_id, message)
     if result.get('success'):
         await update.message.reply_text(result['message'])
@@ -465,7 +465,6 @@ async def edit_command(update, context) -> None:
     
     parts = context.args
     message = "edit " + " ".join(parts)
-    from handlers.content_management import content_manager
     result = await content_manager.handle_management_command(user_id, message)
     if result.get('success'):
         await update.message.reply_text(result['message'])
@@ -690,9 +690,9 @@ async def handle_advanced_reminder_saving(update, content_data: dict) -> None:
         
         # Parse the time with the user's saved timezone and normalize to UTC
         from core.time_parser import parse_time_expression
-        from core.user_prefs import get_user_timezone
+        from core.user_prefs import aget_user_timezone
         import pytz as _pytz
-        user_tz = get_user_timezone(user_id)
+        user_tz = await aget_user_timezone(user_id)
         logger.info(f"🔍 DEBUG: About to parse time: '{time_str}' (tz={user_tz})")
         parsed_time = await parse_time_expression(time_str, user_timezone=user_tz)
         logger.info(f"🔍 DEBUG: Parsed time result: {parsed_time}")
@@ -1021,7 +1021,7 @@ async def handle_question_intent(update, context, message: str, classification:
         logger.info("✅ Successfully sent response with Markdown")
         
     except Exception as e:
-        logger.warning(f"Failed to send with Markdown: {str(e)}")
+        logger.warning(f"Failed to send with Markdown: {e}")
         try:
             # More aggressive cleaning for plain text
             plain_response = response.replace('*', '').replace('_', '').replace('`', '').replace('#', '')
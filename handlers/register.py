@@ -19,10 +19,10 @@ async def register_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Use the user management system to register user
-        from models.user_management import user_manager
+        from models.user_management import get_user_manager
         
         # Simple registration - just create user record
-        success = user_manager.register_user(
+        success = await get_user_manager().aregister_user(
             user_id=user_id,
             telegram_username=username,
             first_name=first_name,
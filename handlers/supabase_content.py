@@ -56,7 +56,7 @@ class SupabaseContentHandler:
             }
             
             # Insert into database
-            result = self.supabase.table('user_content').insert(note_data).execute()
+            result = await self.supabase.table('user_content').insert(note_data).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 note_id = result['data'][0]['id']
@@ -104,7 +104,7 @@ class SupabaseContentHandler:
             }
             
             # Insert into database
-            result = self.supabase.table('user_content').insert(link_data).execute()
+            result = await self.supabase.table('user_content').insert(link_data).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 link_id = result['data'][0]['id']
@@ -153,7 +153,7 @@ class SupabaseContentHandler:
             }
             
             # Insert into database
-            result = self.supabase.table('user_content').insert(task_data).execute()
+            result = await self.supabase.table('user_content').insert(task_data).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 task_id = result['data'][0]['id']
@@ -198,7 +198,7 @@ class SupabaseContentHandler:
             }
             
             # Insert into database
-            result = self.supabase.table('user_content').insert(reminder_data).execute()
+            result = await self.supabase.table('user_content').insert(reminder_data).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 reminder_id = result['data'][0]['id']
@@ -233,7 +233,7 @@ class SupabaseContentHandler:
             
             query = query.order('created_at', desc=True).limit(limit)
             
-            result = query.execute()
+            result = await query.aexecute()
             
             if result.get('data') is not None:
                 return {
@@ -264,7 +264,7 @@ class SupabaseContentHandler:
             search_query = search_query.text_search('search_vector', query)
             search_query = search_query.order('created_at', desc=True).limit(limit)
             
-            result = search_query.execute()
+            result = await search_query.aexecute()
             
             # If we got results, return them
             if result.get('data') and len(result['data']) > 0:
@@ -316,7 +316,7 @@ class SupabaseContentHandler:
                 search_query = search_query.or_(','.join(url_conditions))
                 search_query = search_query.order('created_at', desc=True).limit(limit)
                 
-                result = search_query.execute()
+                result = await search_query.aexecute()
                 
                 return {
                     "success": True,
@@ -343,7 +343,7 @@ class SupabaseContentHandler:
             search_query = search_query.or_(search_conditions)
             search_query = search_query.order('created_at', desc=True).limit(limit)
             
-            result = search_query.execute()
+            result = await search_query.aexecute()
             
             return {
                 "success": True,
@@ -601,7 +601,7 @@ class SupabaseContentHandler:
             updates['updated_at'] = datetime.now(timezone.utc).isoformat()
             
             # Update content in database
-            result = self.supabase.table('user_content').update(updates).eq('id', content_id).eq('user_id', user_id).execute()
+            result = await self.supabase.table('user_content').update(updates).eq('id', content_id).eq('user_id', user_id).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 updated_item = result['data'][0]
@@ -624,7 +624,7 @@ class SupabaseContentHandler:
                 return {"success": False, "error": "Supabase not initialized"}
             
             # Get content details before deletion for confirmation
-            get_result = self.supabase.table('user_content').select('*').eq('id', content_id).eq('user_id', user_id).execute()
+            get_result = await self.supabase.table('user_content').select('*').eq('id', content_id).eq('user_id', user_id).aexecute()
             
             if not get_result.get('data') or len(get_result['data']) == 0:
                 return {"success": False, "error": "Content not found"}
@@ -632,7 +632,7 @@ class SupabaseContentHandler:
             deleted_item = get_result['data'][0]
             
             # Delete content from database
-            result = self.supabase.table('user_content').delete().eq('id', content_id).eq('user_id', user_id).execute()
+            result = await self.supabase.table('user_content').delete().eq('id', content_id).eq('user_id', user_id).aexecute()
             
             if result.get('data') is not None:
                 return {
@@ -668,7 +668,7 @@ class SupabaseContentHandler:
             if not self.supabase:
                 return {"success": False, "error": "Supabase not initialized"}
             
-            result = self.supabase.table('user_content').select('*').eq('id', content_id).eq('user_id', user_id).execute()
+            result = await self.supabase.table('user_content').select('*').eq('id', content_id).eq('user_id', user_id).aexecute()
             
             if result.get('data') and len(result['data']) > 0:
                 return {
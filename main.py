@@ -5,28 +5,61 @@ Simple and effective webhook handler with health monitoring
 """
 
 import os
+import sys
+import queue
+import atexit
 import logging
+import asyncio
 import httpx
 import time
 import secrets
-from datetime import datetime
-from fastapi import FastAPI, Request, BackgroundTasks
+import orjson
+from aiolimiter import AsyncLimiter
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+from fastapi import FastAPI, Request, BackgroundTasks, Depends, Form, HTTPException
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Configure logging (LOG_LEVEL=DEBUG turns the per-message webhook traces back on)
+_log_stream = logging.StreamHandler(sys.stderr)
+_log_stream.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+class _BatchedStreamHandler(MemoryHandler):
+    """MemoryHandler whose flush writes the whole buffer to the target's stream in one write()."""
+
+    def flush(self):
+        with self.lock:
+            target = self.target
+            if not self.buffer or target is None:
+                return
+            records, self.buffer = self.buffer, []
+            try:
+                chunk = "".join(target.format(record) + target.terminator
+                                for record in records if record.levelno >= target.level)
+                target.stream.write(chunk)
+                target.flush()
+            except Exception:
+                # Never let one failed write kill the listener thread
+                self.handleError(records[-1])
+
+# Records are only enqueued on the event loop; a listener thread formats and writes them,
+# batching up to 128 lines per write (ERRORs and the lifespan's 1s tick flush early)
+_log_queue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_root_logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+_log_buffer = _BatchedStreamHandler(capacity=128, flushLevel=logging.ERROR,
+                                    target=_log_stream, flushOnClose=True)
+_log_listener = QueueListener(_log_queue, _log_buffer)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drains the queue, after the lifespan's shutdown logs
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
-from contextlib import asynccontextmanager
-from fastapi import Request, Depends, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from contextlib import asynccontextmanager, nullcontext
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -40,45 +73,98 @@ async def lifespan(app: FastAPI):
     except ImportError:
         pass
 
+    # One pooled client for every Telegram API call (keeps TCP/TLS connections alive)
+    app.state.http = httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=10.0,
+        transport=httpx.AsyncHTTPTransport(
+            retries=2,  # connection-level retries only (DNS/connect failures on a cold worker)
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        ),
+    )
+    app.state.batcher = ChatBatcher(_post_message)
+    # Build the Supabase client before the first webhook needs it (create_client is blocking)
+    await asyncio.to_thread(get_user_manager)
+    app.state.nl_queue = asyncio.Queue(maxsize=NL_QUEUE_MAX)
+    nl_workers = [asyncio.create_task(_nl_worker(app.state.nl_queue)) for _ in range(NL_WORKERS)]
+
     # Configure webhook
     if TELEGRAM_BOT_TOKEN:
-        webhook_url = f"{WEBHOOK_URL}/webhook"
+        # Resolve DNS and open the TLS connection now so the first user message doesn't pay for it;
+        # this also validates the bot token
+        try:
+            me = orjson.loads((await app.state.http.get("/getMe")).content)
+            if me.get("ok"):
+                logger.info(f"✅ Telegram API reachable as @{me['result'].get('username')}")
+            else:
+                logger.error(f"❌ getMe failed: {me}")
+        except Exception as e:
+            logger.error(f"Error warming up Telegram connection: {e}")
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(f"{API_URL}/setWebhook", json={
-                    "url": webhook_url
-                })
-                result = response.json()
-                if result.get("ok"):
-                    log(f"✅ Webhook set successfully: {webhook_url}")
-                else:
-                    log(f"❌ Failed to set webhook: {result}", level="ERROR")
+            response = await app.state.http.post("/setWebhook", content=_SET_WEBHOOK_BODY,
+                                                 headers=_JSON_HEADERS)
+            result = orjson.loads(response.content)
+            if result.get("ok"):
+                logger.info(f"✅ Webhook set successfully: {WEBHOOK_SET_URL}")
+            else:
+                logger.error(f"❌ Failed to set webhook: {result}")
         except Exception as e:
-            log(f"Error setting webhook: {e}", level="ERROR")
+            logger.error(f"Error setting webhook: {e}")
 
     # Start background poller and init scheduler
     try:
         from core.notification_scheduler import get_notification_scheduler
         scheduler = get_notification_scheduler()
-        import asyncio as _asyncio
-        _asyncio.create_task(scheduler.run_background_poller(poll_interval_seconds=15, grace_seconds=30))
+        scheduler.http_client = app.state.http  # absolute URLs bypass base_url; same pooled connections
+        asyncio.create_task(scheduler.run_background_poller(poll_interval_seconds=15, grace_seconds=30))
         await scheduler._ensure_scheduler_initialized()
-        log("🛎️ Background notification poller started (15s interval, 30s grace)")
+        logger.info("🛎️ Background notification poller started (15s interval, 30s grace)")
     except Exception as e:
-        log(f"⚠️ Failed to start background poller/scheduler: {e}", level="WARNING")
+        logger.warning(f"⚠️ Failed to start background poller/scheduler: {e}")
 
-    log("🚀 MySecondMind bot started successfully!")
-    log(f"💚 Health endpoints: {WEBHOOK_URL}/, {WEBHOOK_URL}/health, {WEBHOOK_URL}/ping")
+    last_active_flusher = asyncio.create_task(_flush_last_active_loop())
+    log_flusher = asyncio.create_task(_flush_logs_loop())
+
+    logger.info("🚀 MySecondMind bot started successfully!")
+    logger.info(f"💚 Health endpoints: {WEBHOOK_URL}/, {WEBHOOK_URL}/health, {WEBHOOK_URL}/ping")
 
     yield
 
     # Shutdown
     try:
-        log("🛑 Shutting down MySecondMind bot...")
+        logger.info("🛑 Shutting down MySecondMind bot...")
+    except Exception:
+        pass
+    # Let queued natural-language messages finish before the sender shuts down
+    try:
+        await asyncio.wait_for(app.state.nl_queue.join(), timeout=10)
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Dropping unfinished natural-language jobs on shutdown")
+    for worker in nl_workers:
+        worker.cancel()
+    last_active_flusher.cancel()
+    log_flusher.cancel()
+    await get_user_manager().aflush_last_active()
+    app.state.nl_queue = None
+    await app.state.batcher.aclose()
+    app.state.batcher = None
+    try:
+        from core.notification_scheduler import get_notification_scheduler
+        scheduler = get_notification_scheduler()
+        scheduler_client, scheduler.http_client = scheduler.http_client, None
+        # The scheduler creates its own client if it sends before (or without) ours
+        if scheduler_client is not None and scheduler_client is not app.state.http:
+            await scheduler_client.aclose()
     except Exception:
         pass
+    await app.state.http.aclose()
+    app.state.http = None
 
 app = FastAPI(title="MySecondMind Bot", version="1.0.0", lifespan=lifespan)
+app.state.http = None  # httpx.AsyncClient, created in lifespan
+app.state.batcher = None  # ChatBatcher, created in lifespan
+app.state.nl_queue = None  # asyncio.Queue of natural-language updates, created in lifespan
 
 # Templates
 templates = Jinja2Templates(directory="templates")
@@ -208,7 +294,7 @@ async def auth_telegram(request: Request):
         try:
             # Soft debug: log only parameter keys to avoid PII
             _keys = sorted(list(dict(request.query_params).keys()))
-            log(f"Telegram login failed, param keys: {_keys}", "WARNING")
+            logger.warning(f"Telegram login failed, param keys: {_keys}")
         except Exception:
             pass
     if not ok or not user_id:
@@ -295,11 +381,13 @@ async def auth_check_link(code: str):
 
     # Linked: ensure user exists in Supabase (idempotent)
     try:
-        from models.user_management import user_manager
+        from models.user_management import get_user_manager
         uid = entry["user_id"]
         try:
-            if not user_manager.is_user_registered(uid):
-                user_manager.register_user(uid)
+            user_manager = get_user_manager()
+            if not await user_manager.ais_user_registered(uid):
+                await user_manager.aregister_user(uid)
+                invalidate_registration(uid)
         except Exception:
             pass
     except Exception:
@@ -401,80 +489,111 @@ async def delete_content_route(request: Request, item_id: str, user_id: str = De
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_TOKEN')
 WEBHOOK_URL = os.getenv('RENDER_EXTERNAL_URL', 'https://mymind-924q.onrender.com')
 API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
-
-def log(message, level="INFO"):
-    """Simple logging function"""
-    if level == "ERROR":
-        logger.error(message)
-    elif level == "WARNING":
-        logger.warning(message)
-    else:
-        logger.info(message)
+_JSON_HEADERS = {"content-type": "application/json"}
+WEBHOOK_SET_URL = f"{WEBHOOK_URL}/webhook"
+_SET_WEBHOOK_BODY = orjson.dumps({"url": WEBHOOK_SET_URL})
 
 # Import handlers
 from handlers.register import register_handler
 from handlers.natural_language import process_natural_message
-from models.user_management import user_manager
+from handlers.content_commands import (
+    view_notes_command, view_tasks_command, view_links_command, view_reminders_command,
+    search_command, add_command, delete_command, complete_command, edit_command,
+)
+from handlers.basic_commands import timezone_handler
+from core.telegram_adapter import MockContext, TelegramMessage, TelegramUpdate, build_update
+from models.user_management import get_user_manager
 
 # Initialize advanced AI features
-log("🚀 Initializing Advanced AI Features...")
+logger.info("🚀 Initializing Advanced AI Features...")
 
 # Initialize semantic search engine with multiple fallbacks
 try:
     from core.enhanced_semantic import get_enhanced_engine, log_memory_usage
     semantic_engine = get_enhanced_engine()
-    log("✅ Enhanced semantic search engine initialized (scikit-learn)")
+    logger.info("✅ Enhanced semantic search engine initialized (scikit-learn)")
     log_memory_usage("after enhanced semantic init")
 except ImportError:
     try:
         from core.semantic_search import get_semantic_engine
         semantic_engine = get_semantic_engine()
-        log("✅ Full semantic search engine initialized")
+        logger.info("✅ Full semantic search engine initialized")
     except ImportError:
         try:
             from core.lightweight_semantic import get_lightweight_engine
             semantic_engine = get_lightweight_engine()
-            log("✅ Lightweight semantic search initialized (memory optimized)")
+            logger.info("✅ Lightweight semantic search initialized (memory optimized)")
         except ImportError:
             try:
                 from core.basic_semantic import get_basic_engine
                 semantic_engine = get_basic_engine()
-                log("✅ Ultra-basic semantic search initialized (pure Python)")
+                logger.info("✅ Ultra-basic semantic search initialized (pure Python)")
             except Exception as e3:
-                log(f"⚠️ All semantic search engines failed: {e3}", "WARNING")
+                logger.warning(f"⚠️ All semantic search engines failed: {e3}")
         except Exception as e2:
-            log(f"⚠️ Lightweight semantic search failed: {e2}", "WARNING")
+            logger.warning(f"⚠️ Lightweight semantic search failed: {e2}")
     except Exception as e:
-        log(f"⚠️ Full semantic search failed: {e}", "WARNING")
+        logger.warning(f"⚠️ Full semantic search failed: {e}")
 except Exception as e:
-    log(f"⚠️ Enhanced semantic search failed: {e}", "WARNING")
+    logger.warning(f"⚠️ Enhanced semantic search failed: {e}")
 
 # Initialize notification scheduler (optional)
 try:
     from core.notification_scheduler import get_notification_scheduler
     notification_scheduler = get_notification_scheduler()
-    log("✅ Notification scheduler initialized")
+    logger.info("✅ Notification scheduler initialized")
 except ImportError:
-    log("⚠️ Notification scheduler not available (APScheduler not installed)", "WARNING")
+    logger.warning("⚠️ Notification scheduler not available (APScheduler not installed)")
     notification_scheduler = None
 except Exception as e:
-    log(f"⚠️ Notification scheduler initialization failed: {e}", "WARNING")
+    logger.warning(f"⚠️ Notification scheduler initialization failed: {e}")
     notification_scheduler = None
 
 # Initialize advanced AI
 try:
     from core.advanced_ai import advanced_ai
-    log("✅ Advanced AI conversation engine initialized")
+    logger.info("✅ Advanced AI conversation engine initialized")
 except Exception as e:
-    log(f"⚠️ Advanced AI initialization failed: {e}", "WARNING")
+    logger.warning(f"⚠️ Advanced AI initialization failed: {e}")
+
+logger.info("🎉 Advanced features initialization complete!")
+
+_REGISTRATION_TTL_SECONDS = 5 * 60  # 5 minutes
+_REGISTRATION_CACHE_MAX = 10_000
+_registration_cache = {}  # user_id -> confirmed_at, oldest first
+
+
+async def cached_is_registered(user_id: str) -> bool:
+    """is_user_registered() with a per-process TTL cache so bursts cost one Supabase lookup.
+
+    Only positive answers are kept: a False may come from a swallowed database
+    error, and short-lived misses are already cached by UserManager.
+    """
+    now = time.time()
+    confirmed_at = _registration_cache.get(user_id)
+    if confirmed_at is not None and now - confirmed_at <= _REGISTRATION_TTL_SECONDS:
+        return True
+
+    registered = await get_user_manager().ais_user_registered(user_id)
+    _registration_cache.pop(user_id, None)
+    if registered:
+        if len(_registration_cache) >= _REGISTRATION_CACHE_MAX:
+            _registration_cache.pop(next(iter(_registration_cache)))
+        _registration_cache[user_id] = now
+    return registered
+
+
+def invalidate_registration(user_id: str) -> None:
+    """Drop a cached registration result, e.g. right after the user registers."""
+    _registration_cache.pop(str(user_id), None)
 
-log("🎉 Advanced features initialization complete!")
 
 async def check_user_registration(mock_update, chat_id):
     """Check if user is registered, send registration prompt if not."""
     user_id = str(mock_update.effective_user.id)
     
-    if user_manager.is_user_registered(user_id):
+    if await cached_is_registered(user_id):
+        get_user_manager().update_last_active(user_id)
         return True
     else:
         # Send registration prompt
@@ -485,43 +604,366 @@ async def check_user_registration(mock_update, chat_id):
             "This will activate your account and set up your personal Second Brain! 🧠")
         return False
 
-async def send_message(chat_id, text, parse_mode=None):
-    """Send a message to Telegram chat."""
+async def _flush_logs_loop():
+    """Push buffered log lines out at least once a second."""
+    while True:
+        await asyncio.sleep(1)
+        await asyncio.to_thread(_log_buffer.flush)
+
+LAST_ACTIVE_FLUSH_SECONDS = 5
+
+async def _flush_last_active_loop():
+    """Write the users seen in the last few seconds to Supabase in one batch."""
+    while True:
+        await asyncio.sleep(LAST_ACTIVE_FLUSH_SECONDS)
+        try:
+            await get_user_manager().aflush_last_active()
+        except Exception as e:
+            logger.warning("last_active flush failed: %s", e)
+
+# Telegram flood limits: ~30 messages/s per bot overall, 20 messages/min per group chat
+GLOBAL_LIMITER = AsyncLimiter(30, 1)
+CHAT_LIMITERS = {}  # group chat_id -> AsyncLimiter
+_NO_CHAT_LIMIT = nullcontext()
+
+def _chat_limiter(chat_id):
+    # Private chats have positive ids and only the global limit applies
+    if not isinstance(chat_id, int) or chat_id > 0:
+        return _NO_CHAT_LIMIT
+    limiter = CHAT_LIMITERS.get(chat_id)
+    if limiter is None:
+        limiter = CHAT_LIMITERS[chat_id] = AsyncLimiter(20, 60)
+    return limiter
+
+def _tg_len(text):
+    """Length as Telegram counts it: UTF-16 code units, so most emoji count as 2."""
+    return len(text.encode("utf-16-le")) // 2
+
+class ChatBatcher:
+    """Coalesces replies to the same chat that arrive within `window` seconds into one sendMessage."""
+
+    def __init__(self, post, window=0.02, max_chars=4096):
+        self._post = post  # coroutine function (chat_id, text, parse_mode)
+        self._window = window
+        self._max_chars = max_chars  # Telegram's per-message limit, in UTF-16 code units
+        self._pending = {}  # chat_id -> [parse_mode, texts, length]
+        self._inflight = {}  # chat_id -> latest delivery task, so a chat's sends stay ordered
+
+    def add(self, chat_id, text, parse_mode=None):
+        length = _tg_len(text)
+        batch = self._pending.get(chat_id)
+        if batch is not None and (batch[0] != parse_mode or batch[2] + 2 + length > self._max_chars):
+            self.flush(chat_id)
+            batch = None
+        if batch is None:
+            self._pending[chat_id] = [parse_mode, [text], length]
+            asyncio.get_running_loop().call_later(self._window, self.flush, chat_id)
+        else:
+            batch[1].append(text)
+            batch[2] += 2 + length
+
+    def flush(self, chat_id):
+        """Start delivering the chat's pending batch; returns the delivery task (or None)."""
+        batch = self._pending.pop(chat_id, None)
+        if batch is None:
+            return None
+        prev = self._inflight.get(chat_id)
+        task = asyncio.create_task(self._deliver(prev, chat_id, batch[1], batch[0]))
+        self._inflight[chat_id] = task
+        task.add_done_callback(lambda t: self._inflight.pop(chat_id, None) if self._inflight.get(chat_id) is t else None)
+        return task
+
+    async def _deliver(self, prev, chat_id, texts, parse_mode):
+        if prev is not None:
+            await asyncio.wait([prev])
+        result = await self._post(chat_id, "\n\n".join(texts), parse_mode)
+        if len(texts) > 1 and result is not None and result.get("error_code") == 400:
+            # Telegram rejected the batch (e.g. one piece has broken Markdown):
+            # send the pieces separately so only the bad one is lost
+            for text in texts:
+                result = await self._post(chat_id, text, parse_mode)
+        return result
+
+    async def aclose(self):
+        for chat_id in list(self._pending):
+            self.flush(chat_id)
+        if self._inflight:
+            await asyncio.wait(list(self._inflight.values()))
+
+# When Telegram answers 429 it says how long to back off; every sender honours that pause
+_FLOOD_RETRIES = 2
+_flood_until = 0.0  # time.monotonic() deadline
+
+async def _post_message(chat_id, text, parse_mode=None):
+    """POST one sendMessage call through the shared client and the flood limiters."""
+    global _flood_until
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "chat_id": chat_id,
-                "text": text
-            }
-            if parse_mode:
-                payload["parse_mode"] = parse_mode
-                
-            response = await client.post(f"{API_URL}/sendMessage", json=payload)
-            return response.json()
+        payload = {
+            "chat_id": chat_id,
+            "text": text
+        }
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        body = orjson.dumps(payload)
+
+        for attempt in range(_FLOOD_RETRIES + 1):
+            pause = _flood_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            async with _chat_limiter(chat_id), GLOBAL_LIMITER:
+                response = await app.state.http.post("/sendMessage", content=body, headers=_JSON_HEADERS)
+            result = orjson.loads(response.content)
+            if response.status_code != 429 or attempt == _FLOOD_RETRIES:
+                return result
+            retry_after = (result.get("parameters") or {}).get("retry_after", 1)
+            logger.warning("Telegram flood limit hit, retrying chat %s in %ss", chat_id, retry_after)
+            _flood_until = max(_flood_until, time.monotonic() + retry_after)
     except Exception as e:
-        log(f"Error sending message: {e}", level="ERROR")
+        logger.error("Error sending message: %s", e)
         return None
 
+async def send_message(chat_id, text, parse_mode=None):
+    """Send a message to Telegram chat.
+
+    Messages are queued briefly so consecutive replies to one chat share a request.
+    """
+    batcher = app.state.batcher
+    if batcher is None:
+        return await _post_message(chat_id, text, parse_mode)
+    batcher.add(chat_id, text, parse_mode)
+    return None
+
+async def _run(cmd, command, message, chat_id, user_id_int, tail):
+    """Run a COMMAND_TABLE entry against a mock update; the single error path for all commands."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("processing %s for %s", cmd, user_id_int)
+    try:
+        user = message.from_
+        mock_update = build_update(
+            message.text, chat_id, send_message, user_id_int, user.username,
+            user.first_name, user.last_name
+        )
+        await command(mock_update, tail)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s completed for %s", cmd, user_id_int)
+    except Exception as e:
+        logger.error("❌ Error in %s: %s", cmd, e)
+        await send_message(chat_id, f"❌ Error: {e}")
+
+# Natural-language messages fan out to LLM calls that can take seconds; a fixed pool of
+# workers drains them so a burst of messages can't start an unbounded number of calls
+NL_WORKERS = int(os.getenv("NL_WORKERS", 4))
+NL_QUEUE_MAX = int(os.getenv("NL_QUEUE_MAX", 100))
+NL_ERROR_TEXT = ("I understand your message, but I'm having trouble processing it right now. "
+                 "Please try again!")
+
+async def _process_natural(mock_update):
+    try:
+        await process_natural_message(mock_update, None)
+        logger.debug("✅ Natural language processing completed for user %s", mock_update.effective_user.id)
+    except Exception as e:
+        logger.error("❌ Error processing natural language: %s", e)
+        await send_message(mock_update.message.chat_id, NL_ERROR_TEXT)
+
+async def _nl_worker(queue):
+    while True:
+        mock_update = await queue.get()
+        try:
+            await _process_natural(mock_update)
+        finally:
+            queue.task_done()
+
+# --- Built-in bot commands (same (update, context) shape as the handlers/ modules) ---
+HELP_TEXT = """
+🤖 **MySecondMind Help**
+
+**📋 Commands:**
+• `/start` - Welcome message and introduction
+• `/register` - Activate your account
+• `/help` - Show this help menu
+
+**👁️ View Your Content:**
+• `/notes` - Show your recent notes  
+• `/tasks` - Show your recent tasks
+• `/links` - Show your saved links
+• `/reminders` - Show your reminders
+• `/stats` - Show content statistics
+
+**➕ Create Content:**
+• `/add note <text>`
+• `/add task <text>`
+• `/add link <url> [context]`
+• `/add reminder <text>`
+
+**✏️ Edit / 🗑️ Delete / ✅ Complete:**
+• `/edit <id> <new text>` or `/edit note <id> <new text>`
+• `/delete <id>` or `/delete task <id>`
+• `/complete <id>` or `/complete task <id>`
+
+**🔍 Search & Find:**
+• `/search <query>` - Search all your content
+• `/search notes <query>` - Search only notes
+• `/search tasks <query>` - Search only tasks
+• `/search links <query>` - Search only links
+
+**🗣️ Natural Language:**
+Just talk to me naturally! I understand:
+
+*💭 Notes & Ideas:*
+• "I learned that Supabase is awesome!"
+• "Remember: Python is great for automation"
+• "Note: Meeting insights from today"
+
+*📋 Tasks & TODOs:*
+• "I need to finish the project by Friday"
+• "Task: Review team performance metrics"
+• "Must complete code review before noon"
+
+*🔗 Links & Articles:*
+• "Read later: https://interesting-article.com"
+• "Bookmark: https://useful-tool.com for productivity"
+• "Save this: https://tutorial.com about Python"
+
+*⏰ Reminders:*
+• "Remind me to call mom tomorrow at 6pm"
+• "Alert me about the meeting at 2pm"
+• "Don't forget to submit report by Friday"
+
+**🧠 Your Second Brain is ready to help!**
+"""
+
+WELCOME_TEXT = (
+    "👋 Welcome to MySecondMind!\n\n"
+    "Use /register to activate your account, or generate a code on the website and send /link <code> here."
+)
+
+UNKNOWN_CMD_TMPL = "❓ Unknown command: {cmd}\n\nUse /help to see available commands."
+MAX_ECHOED_CMD = 64  # longest command word quoted back in UNKNOWN_CMD_TMPL
+
+NON_TEXT_TEXT = ("I received your message! Currently I work best with text messages. "
+                 "More features coming soon! 🚀")
+
+async def start_command(update, context):
+    # Deep-link payload support: /start link_<CODE>
+    if context.args and context.args[0].startswith("link_"):
+        code = context.args[0].split("link_", 1)[1].strip()
+        entry = _link_codes.get(code)
+        now = int(_time())
+        if entry and not entry.get("used") and now - entry.get("created", 0) <= _LINK_TTL_SECONDS:
+            entry["user_id"] = str(update.effective_user.id)
+            await update.message.reply_text("✅ Linked! Return to the website and continue.")
+            return
+    await update.message.reply_text(WELCOME_TEXT)
+
+async def register_command(update, context):
+    await register_handler(update, context)
+    invalidate_registration(update.effective_user.id)
+
+async def help_command(update, context):
+    await update.message.reply_text(HELP_TEXT)
+
+async def status_command(update, context):
+    await update.message.reply_text(
+        "🟢 MySecondMind Status: ONLINE\n"
+        f"🕐 Current time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        "💚 All systems operational!")
+
+async def health_command(update, context):
+    await update.message.reply_text("🟢 Bot is healthy and running!")
+
+async def link_command(update, context):
+    if not context.args:
+        await update.message.reply_text("Usage: /link 123456\nGet a code from the web dashboard login page and send it here.")
+        return
+    code = context.args[0]
+    entry = _link_codes.get(code)
+    now = int(_time())
+    if not entry:
+        await update.message.reply_text("❌ Invalid code. Please create a new one from the web page and try again.")
+        return
+    if entry.get("used") or now - entry.get("created", 0) > _LINK_TTL_SECONDS:
+        _link_codes.pop(code, None)
+        await update.message.reply_text("⌛ Code expired. Please generate a new code on the web page and try again.")
+        return
+    # Link this code to current Telegram user
+    entry["user_id"] = str(update.effective_user.id)
+    await update.message.reply_text("✅ Linked! Return to the website and continue. You can close this chat if you like.")
+
+# Each entry is specialized once at import: it receives the mock update and the raw
+# argument text, and builds exactly the context its handler expects.
+def _no_args(handler):
+    return lambda update, tail: handler(update, None)
+
+def _with_args(handler):
+    return lambda update, tail: handler(update, MockContext(tail.split()))
+
+def _registered(command):
+    async def run(update, tail):
+        if await check_user_registration(update, update.message.chat_id):
+            await command(update, tail)
+    return run
+
+COMMAND_TABLE = {
+    "/start": _with_args(start_command),
+    "/help": _no_args(help_command),
+    "/register": _no_args(register_command),
+    "/status": _no_args(status_command),
+    "/health": _no_args(health_command),
+    "/link": _with_args(link_command),
+    # View commands
+    "/notes": _registered(_no_args(view_notes_command)),
+    "/tasks": _registered(_no_args(view_tasks_command)),
+    "/links": _registered(_no_args(view_links_command)),
+    "/reminders": _registered(_no_args(view_reminders_command)),
+    "/search": _registered(_with_args(search_command)),
+    # CRUD via slash commands
+    "/add": _registered(_with_args(add_command)),
+    "/delete": _registered(_with_args(delete_command)),
+    "/complete": _registered(_with_args(complete_command)),
+    "/edit": _registered(_with_args(edit_command)),
+    # Aliases
+    "/remove": _registered(_with_args(delete_command)),
+    "/done": _registered(_with_args(complete_command)),
+    "/update": _registered(_with_args(edit_command)),
+    "/timezone": _with_args(timezone_handler),
+}
+
 # --- Health check endpoints ---
+# Uptime monitors poll these every few seconds; the serialized bodies are rebuilt at most once a second
+_HEALTH_ROOT = {
+    "status": "healthy",
+    "service": "MySecondMind Bot",
+    "message": "🟢 Bot is online and ready!"
+}
+
+_HEALTH_DETAIL = {
+    "status": "healthy",
+    "bot_configured": bool(TELEGRAM_BOT_TOKEN),
+    "webhook_url": WEBHOOK_URL,
+}
+
+_health_cache = {"mono": 0.0, "root": b"", "detail": b""}
+
+def _health_bodies() -> dict:
+    now = time.monotonic()
+    if now - _health_cache["mono"] > 1.0:
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        _health_cache["root"] = orjson.dumps({**_HEALTH_ROOT, "timestamp": timestamp})
+        _health_cache["detail"] = orjson.dumps({**_HEALTH_DETAIL, "timestamp": timestamp})
+        _health_cache["mono"] = now
+    return _health_cache
+
+_STATUS_OK_BODY = orjson.dumps({"status": "ok"})
+
 @app.get("/")
 async def health_check():
     """Root health check for UptimeRobot"""
-    return {
-        "status": "healthy",
-        "service": "MySecondMind Bot",
-        "timestamp": datetime.now().isoformat(),
-        "message": "🟢 Bot is online and ready!"
-    }
+    return Response(_health_bodies()["root"], media_type="application/json")
 
 @app.get("/health")
 async def health_status():
     """Detailed health status"""
-    return {
-        "status": "healthy",
-        "bot_configured": bool(TELEGRAM_BOT_TOKEN),
-        "webhook_url": WEBHOOK_URL,
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(_health_bodies()["detail"], media_type="application/json")
 
 @app.get("/ping")
 async def ping():
@@ -546,7 +988,7 @@ async def ping_head():
 @app.get("/status")
 async def simple_status():
     """Ultra simple status endpoint for UptimeRobot"""
-    return {"status": "ok"}
+    return Response(_STATUS_OK_BODY, media_type="application/json")
 
 @app.get("/ok")
 async def simple_ok():
@@ -570,7 +1012,7 @@ async def debug_routes():
 @app.get("/webhook")
 async def webhook_get():
     """Debug: Webhook called with GET method"""
-    log("⚠️ Webhook called with GET method - this might be the 405 issue!")
+    logger.info("⚠️ Webhook called with GET method - this might be the 405 issue!")
     return {"error": "Webhook should use POST method", "method": "GET"}
 
 @app.options("/webhook")
@@ -586,741 +1028,160 @@ async def webhook_head():
 @app.get("/reset-webhook")
 async def reset_webhook():
     """Manually reset the Telegram webhook"""
-    webhook_url = f"{WEBHOOK_URL}/webhook"
     try:
-        async with httpx.AsyncClient() as client:
-            # First delete existing webhook
-            delete_response = await client.post(f"{API_URL}/deleteWebhook")
-            delete_result = delete_response.json()
-            
-            # Then set new webhook
-            set_response = await client.post(f"{API_URL}/setWebhook", json={
-                "url": webhook_url
-            })
-            set_result = set_response.json()
-            
-            return {
-                "delete_webhook": delete_result,
-                "set_webhook": set_result,
-                "new_webhook_url": webhook_url
-            }
+        client = app.state.http
+        # First delete existing webhook
+        delete_response = await client.post("/deleteWebhook")
+        delete_result = orjson.loads(delete_response.content)
+        
+        # Then set new webhook
+        set_response = await client.post("/setWebhook", content=_SET_WEBHOOK_BODY, headers=_JSON_HEADERS)
+        set_result = orjson.loads(set_response.content)
+        
+        return {
+            "delete_webhook": delete_result,
+            "set_webhook": set_result,
+            "new_webhook_url": WEBHOOK_SET_URL
+        }
     except Exception as e:
         return {"error": str(e)}
 
 # --- Webhook handler ---
 @app.post("/webhook")
-async def telegram_webhook(request: Request):
+async def telegram_webhook(request: Request, background_tasks: BackgroundTasks):
     """Handle incoming Telegram webhook"""
-    log("🔍 Webhook endpoint hit via POST method")
-    return await handle_telegram_webhook(request)
+    logger.debug("🔍 Webhook endpoint hit via POST method")
+    return await handle_telegram_webhook(request, background_tasks)
 
 @app.post("/telegram")
-async def telegram_webhook_alt(request: Request):
+async def telegram_webhook_alt(request: Request, background_tasks: BackgroundTasks):
     """Alternative webhook endpoint for telegram-bot compatibility"""
-    log("🔍 /telegram endpoint hit via POST method")
-    return await handle_telegram_webhook(request)
+    logger.debug("🔍 /telegram endpoint hit via POST method")
+    return await handle_telegram_webhook(request, background_tasks)
 
 aSYNC_TOKEN = object()  # prevent accidental typos in edits
 
-async def handle_telegram_webhook(request: Request):
+# Shared webhook acknowledgement; FastAPI only reads it when serializing the response
+_OK = {"ok": True}
+
+async def handle_telegram_webhook(request: Request, background_tasks: BackgroundTasks):
+    """Acknowledge the update right away; the message is processed after the response is sent."""
+    try:
+        body = await request.body()
+        # edited_message, callback_query, my_chat_member, ... are acknowledged without parsing;
+        # the byte scan can only give false positives, which the model check below catches
+        if b'"message"' not in body:
+            logger.debug("Ignoring non-message update")
+            return _OK
+        
+        # Parse and validate the incoming webhook data in one pass (pydantic-core)
+        update = TelegramUpdate.model_validate_json(body)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received webhook: %r", update)
+        
+        if update.message is None:
+            logger.debug("No message in webhook data")
+            return _OK
+        
+        background_tasks.add_task(_dispatch, update.message)
+    except Exception as e:
+        logger.error("Error in webhook handler: %s", e)
+    
+    # Always return success to Telegram
+    return _OK
+
+async def _dispatch(message: TelegramMessage):
     """Actual webhook processing logic"""
     chat_id = None
     user_id = None
     
     try:
-        # Parse the incoming webhook data
-        data = await request.json()
-        log(f"Received webhook: {data}")
-        
-        if "message" not in data:
-            log("No message in webhook data", level="WARNING")
-            return {"ok": True}
-        
-        message = data["message"]
-        chat_id = message["chat"]["id"]
-        user_id = str(message["from"]["id"])
+        chat_id = message.chat.id
+        user_id_int = message.from_.id
+        user_id = str(user_id_int)
         
         # Process different message types
-        if "text" in message:
+        if message.text is not None:
             # Handle text messages
-            text = message["text"]
-            log(f"🚀 NEW VERSION: Handling message: {text} from user {user_id}")
-            
-            # CRITICAL DEBUG: Check text properties
-            log(f"🔍 DEBUG: text='{text}', type={type(text)}, repr={repr(text)}")
-            log(f"🔍 DEBUG: text.startswith('/')={text.startswith('/')}")
-            log(f"🔍 DEBUG: len(text)={len(text)}, first_char='{text[0] if text else 'EMPTY'}'")
+            text = message.text
+            clean_text = text.strip()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 text=%r len=%d user=%s", text, len(text), user_id)
             
             # Process commands
-            if text.startswith("/"):
-                cmd = text.split()[0].lower()
-                log(f"🎯 COMMAND DETECTED: {cmd}")
-                log(f"🎯 ENTERING COMMAND PROCESSING BLOCK")
+            if clean_text and clean_text[0] == "/":
+                # Only the command word is split off (at any whitespace); handlers that
+                # take args split the tail themselves
+                parts = clean_text.split(maxsplit=1)
+                cmd = parts[0].lower()
+                tail = parts[1] if len(parts) > 1 else ""
+                logger.info("cmd=%.64s user=%s", cmd, user_id)
                 
-                if cmd == "/start":
-                    # Deep-link payload support: /start link_<CODE>
-                    parts = text.split(maxsplit=1)
-                    if len(parts) > 1 and parts[1].startswith("link_"):
-                        code = parts[1].split("link_", 1)[1].strip()
-                        entry = _link_codes.get(code)
-                        now = int(_time())
-                        if entry and not entry.get("used") and now - entry.get("created", 0) <= _LINK_TTL_SECONDS:
-                            entry["user_id"] = str(user_id)
-                            await send_message(chat_id, "✅ Linked! Return to the website and continue.")
-                            return {"ok": True}
-                    await send_message(chat_id, "👋 Welcome to MySecondMind!\n\nUse /register to activate your account, or generate a code on the website and send /link <code> here.")
-                    return {"ok": True}
-                    
-                elif cmd == "/help":
-                    help_text = """
-🤖 **MySecondMind Help**
-
-**📋 Commands:**
-• `/start` - Welcome message and introduction
-• `/register` - Activate your account
-• `/help` - Show this help menu
-
-**👁️ View Your Content:**
-• `/notes` - Show your recent notes  
-• `/tasks` - Show your recent tasks
-• `/links` - Show your saved links
-• `/reminders` - Show your reminders
-• `/stats` - Show content statistics
-
-**➕ Create Content:**
-• `/add note <text>`
-• `/add task <text>`
-• `/add link <url> [context]`
-• `/add reminder <text>`
-
-**✏️ Edit / 🗑️ Delete / ✅ Complete:**
-• `/edit <id> <new text>` or `/edit note <id> <new text>`
-• `/delete <id>` or `/delete task <id>`
-• `/complete <id>` or `/complete task <id>`
-
-**🔍 Search & Find:**
-• `/search <query>` - Search all your content
-• `/search notes <query>` - Search only notes
-• `/search tasks <query>` - Search only tasks
-• `/search links <query>` - Search only links
-
-**🗣️ Natural Language:**
-Just talk to me naturally! I understand:
-
-*💭 Notes & Ideas:*
-• "I learned that Supabase is awesome!"
-• "Remember: Python is great for automation"
-• "Note: Meeting insights from today"
-
-*📋 Tasks & TODOs:*
-• "I need to finish the project by Friday"
-• "Task: Review team performance metrics"
-• "Must complete code review before noon"
-
-*🔗 Links & Articles:*
-• "Read later: https://interesting-article.com"
-• "Bookmark: https://useful-tool.com for productivity"
-• "Save this: https://tutorial.com about Python"
-
-*⏰ Reminders:*
-• "Remind me to call mom tomorrow at 6pm"
-• "Alert me about the meeting at 2pm"
-• "Don't forget to submit report by Friday"
+                command = COMMAND_TABLE.get(cmd)
+                if command is None:
+                    await send_message(chat_id, UNKNOWN_CMD_TMPL.format(cmd=cmd[:MAX_ECHOED_CMD]))
+                    return
 
-**🧠 Your Second Brain is ready to help!**
-"""
-                    await send_message(chat_id, help_text)
-                    return {"ok": True}
-                    
-                elif cmd == "/register":
-                    log(f"🎯 Processing /register for user {user_id}")
-                    # Create mock update object for registration handler
-                    class MockUpdate:
-                        def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                            self.message = MockMessage(text, chat_id)
-                            self.effective_user = MockUser(user_id, username, first_name, last_name)
-                    
-                    class MockMessage:
-                        def __init__(self, text, chat_id):
-                            self.text = text
-                            self.chat_id = chat_id
-                            
-                        async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                            await send_message(self.chat_id, response, parse_mode)
-                    
-                    class MockUser:
-                        def __init__(self, user_id, username, first_name=None, last_name=None):
-                            self.id = int(user_id)
-                            self.username = username
-                            self.first_name = first_name
-                            self.last_name = last_name
-                    
-                    try:
-                        user_data = message.get("from", {})
-                        mock_update = MockUpdate(
-                            text, 
-                            chat_id, 
-                            user_id, 
-                            user_data.get("username"),
-                            user_data.get("first_name"),
-                            user_data.get("last_name")
-                        )
-                        await register_handler(mock_update, None)
-                        log(f"✅ /register completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /register: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Registration failed: {str(e)}")
-                    return {"ok": True}
-                    
-                elif cmd == "/status":
-                    await send_message(chat_id, 
-                        "🟢 MySecondMind Status: ONLINE\n"
-                        f"🕐 Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                        "💚 All systems operational!")
-                    return {"ok": True}
-                    
-                elif cmd == "/health":
-                    await send_message(chat_id, "🟢 Bot is healthy and running!")
-                    return {"ok": True}
-
-                elif cmd == "/search":
-                    log(f"🔎 Processing /search for user {user_id}")
-                    try:
-                        from handlers.content_commands import search_command
-                        user_data = message.get("from", {})
-
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-
-                        # Args after /search
-                        parts = message["text"].split()[1:]
-                        mock_update = MockUpdate(message["text"], chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-
-                        # Ensure registration
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-
-                        await search_command(mock_update, mock_context)
-                        log(f"✅ /search completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /search: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error searching: {str(e)}")
-                    return {"ok": True}
-
-                elif cmd == "/link":
-                    try:
-                        parts = text.split()
-                        if len(parts) < 2:
-                            await send_message(chat_id, "Usage: /link 123456\nGet a code from the web dashboard login page and send it here.")
-                            return {"ok": True}
-                        code = parts[1].strip()
-                        entry = _link_codes.get(code)
-                        now = int(_time())
-                        if not entry:
-                            await send_message(chat_id, "❌ Invalid code. Please create a new one from the web page and try again.")
-                            return {"ok": True}
-                        if entry.get("used") or now - entry.get("created", 0) > _LINK_TTL_SECONDS:
-                            _link_codes.pop(code, None)
-                            await send_message(chat_id, "⌛ Code expired. Please generate a new code on the web page and try again.")
-                            return {"ok": True}
-                        # Link this code to current Telegram user
-                        entry["user_id"] = str(user_id)
-                        await send_message(chat_id, "✅ Linked! Return to the website and continue. You can close this chat if you like.")
-                    except Exception as e:
-                        log(f"❌ Error in /link: {e}", "ERROR")
-                        await send_message(chat_id, "❌ Failed to link. Please create a new code and try again.")
-                    return {"ok": True}
-                
-                # View commands
-                elif cmd == "/notes":
-                    log(f"🗒️ Processing /notes for user {user_id}")
-                    # Create mock update for content commands
-                    class MockUpdate:
-                        def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                            self.message = MockMessage(text, chat_id)
-                            self.effective_user = MockUser(user_id, username, first_name, last_name)
-                    
-                    class MockMessage:
-                        def __init__(self, text, chat_id):
-                            self.text = text
-                            self.chat_id = chat_id
-                            
-                        async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                            await send_message(self.chat_id, response, parse_mode)
-                    
-                    class MockUser:
-                        def __init__(self, user_id, username, first_name=None, last_name=None):
-                            self.id = int(user_id)
-                            self.username = username
-                            self.first_name = first_name
-                            self.last_name = last_name
-                    
-                    try:
-                        from handlers.content_commands import view_notes_command
-                        user_data = message.get("from", {})
-                        mock_update = MockUpdate(
-                            text, chat_id, user_id, user_data.get("username"),
-                            user_data.get("first_name"), user_data.get("last_name")
-                        )
-                        
-                        # Check registration first
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                            
-                        await view_notes_command(mock_update, None)
-                        log(f"✅ /notes completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /notes: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error retrieving notes: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/tasks":
-                    log(f"📋 Processing /tasks for user {user_id}")
-                    try:
-                        from handlers.content_commands import view_tasks_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        mock_update = MockUpdate(
-                            text, chat_id, user_id, user_data.get("username"),
-                            user_data.get("first_name"), user_data.get("last_name")
-                        )
-                        
-                        # Check registration first
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                            
-                        await view_tasks_command(mock_update, None)
-                        log(f"✅ /tasks completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /tasks: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error retrieving tasks: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/links":
-                    log(f"🔗 Processing /links for user {user_id}")
-                    try:
-                        from handlers.content_commands import view_links_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        mock_update = MockUpdate(
-                            text, chat_id, user_id, user_data.get("username"),
-                            user_data.get("first_name"), user_data.get("last_name")
-                        )
-                        
-                        # Check registration first
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                            
-                        await view_links_command(mock_update, None)
-                        log(f"✅ /links completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /links: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error retrieving links: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/reminders":
-                    log(f"⏰ Processing /reminders for user {user_id}")
-                    try:
-                        from handlers.content_commands import view_reminders_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        mock_update = MockUpdate(
-                            text, chat_id, user_id, user_data.get("username"),
-                            user_data.get("first_name"), user_data.get("last_name")
-                        )
-                        
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                        
-                        await view_reminders_command(mock_update, None)
-                        log(f"✅ /reminders completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /reminders: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error retrieving reminders: {str(e)}")
-                    return {"ok": True}
-                
-                # CRUD via slash commands
-                elif cmd == "/add":
-                    log(f"➕ Processing /add for user {user_id}")
-                    try:
-                        from handlers.content_commands import add_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-                        
-                        # Parse args after /add
-                        parts = text.split()[1:]
-                        mock_update = MockUpdate(text, chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-                        
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                        
-                        await add_command(mock_update, mock_context)
-                        log(f"✅ /add completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /add: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error adding content: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/delete":
-                    log(f"🗑️ Processing /delete for user {user_id}")
-                    try:
-                        from handlers.content_commands import delete_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-                        
-                        parts = text.split()[1:]
-                        mock_update = MockUpdate(text, chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-                        
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                        
-                        await delete_command(mock_update, mock_context)
-                        log(f"✅ /delete completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /delete: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error deleting content: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/complete":
-                    log(f"✅ Processing /complete for user {user_id}")
-                    try:
-                        from handlers.content_commands import complete_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-                        
-                        parts = text.split()[1:]
-                        mock_update = MockUpdate(text, chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-                        
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                        
-                        await complete_command(mock_update, mock_context)
-                        log(f"✅ /complete completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /complete: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error completing task: {str(e)}")
-                    return {"ok": True}
-                
-                elif cmd == "/edit":
-                    log(f"✏️ Processing /edit for user {user_id}")
-                    try:
-                        from handlers.content_commands import edit_command
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                                
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-                        
-                        parts = text.split()[1:]
-                        mock_update = MockUpdate(text, chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-                        
-                        if not await check_user_registration(mock_update, chat_id):
-                            return {"ok": True}
-                        
-                        await edit_command(mock_update, mock_context)
-                        log(f"✅ /edit completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /edit: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error editing content: {str(e)}")
-                    return {"ok": True}
-
-                elif cmd == "/timezone":
-                    log(f"🌍 Processing /timezone for user {user_id}")
-                    try:
-                        from handlers.basic_commands import timezone_handler
-                        user_data = message.get("from", {})
-                        
-                        class MockUpdate:
-                            def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                                self.message = MockMessage(text, chat_id)
-                                self.effective_user = MockUser(user_id, username, first_name, last_name)
-                        
-                        class MockMessage:
-                            def __init__(self, text, chat_id):
-                                self.text = text
-                                self.chat_id = chat_id
-                            async def reply_text(self, response, parse_mode=None, disable_web_page_preview=None):
-                                await send_message(self.chat_id, response, parse_mode)
-                        
-                        class MockUser:
-                            def __init__(self, user_id, username, first_name=None, last_name=None):
-                                self.id = int(user_id)
-                                self.username = username
-                                self.first_name = first_name
-                                self.last_name = last_name
-                        
-                        class MockContext:
-                            def __init__(self, args):
-                                self.args = args
-                        
-                        parts = text.split()[1:]
-                        mock_update = MockUpdate(text, chat_id, user_id, user_data.get("username"), user_data.get("first_name"), user_data.get("last_name"))
-                        mock_context = MockContext(parts)
-                        
-                        await timezone_handler(mock_update, mock_context)
-                        log(f"✅ /timezone completed for user {user_id}")
-                    except Exception as e:
-                        log(f"❌ Error in /timezone: {e}", "ERROR")
-                        await send_message(chat_id, f"❌ Error setting timezone: {str(e)}")
-                    return {"ok": True}
-                
-                else:
-                    # Unknown command
-                    await send_message(chat_id, f"❓ Unknown command: {cmd}\n\nUse /help to see available commands.")
-                    return {"ok": True}
+                await _run(cmd, command, message, chat_id, user_id_int, tail)
             
             # Process non-command messages with natural language
             else:
-                log(f"💬 Processing natural language: {text}")
+                logger.debug("💬 Processing natural language for user %s", user_id)
                 try:
-                    # Create a mock update object for the handler
-                    class MockUpdate:
-                        def __init__(self, text, chat_id, user_id, username, first_name=None, last_name=None):
-                            self.message = MockMessage(text, chat_id, user_id)
-                            self.effective_user = MockEffectiveUser(user_id, username, first_name, last_name)
-                    
-                    class MockMessage:
-                        def __init__(self, text, chat_id, user_id):
-                            self.text = text
-                            self.chat_id = chat_id
-                            self.from_user = MockUser(user_id)
-                            
-                        async def reply_text(self, response, parse_mode=None):
-                            await send_message(self.chat_id, response, parse_mode)
-                    
-                    class MockUser:
-                        def __init__(self, user_id):
-                            self.id = user_id
-
-                    class MockEffectiveUser:
-                        def __init__(self, user_id, username, first_name=None, last_name=None):
-                            self.id = int(user_id)
-                            self.username = username
-                            self.first_name = first_name
-                            self.last_name = last_name
-                    
                     # Check if user is registered before processing natural language
-                    user_data = message.get("from", {})
-                    mock_update = MockUpdate(
+                    user = message.from_
+                    mock_update = build_update(
                         text, 
                         chat_id, 
-                        user_id, 
-                        user_data.get("username"),
-                        user_data.get("first_name"),
-                        user_data.get("last_name")
+                        send_message,
+                        user_id_int, 
+                        user.username,
+                        user.first_name,
+                        user.last_name
                     )
                     
                     # For natural language processing, check registration first
                     if not await check_user_registration(mock_update, chat_id):
-                        return {"ok": True}  # Registration prompt already sent
+                        return  # Registration prompt already sent
                     
-                    # Process with natural language handler
-                    await process_natural_message(mock_update, None)
-                    log(f"✅ Natural language processing completed for user {user_id}")
+                    # Hand off to the natural-language workers
+                    queue = app.state.nl_queue
+                    if queue is None:
+                        await _process_natural(mock_update)
+                    else:
+                        try:
+                            queue.put_nowait(mock_update)
+                        except asyncio.QueueFull:
+                            logger.warning("Natural-language queue full, rejecting message from %s", user_id)
+                            await send_message(chat_id, "⏳ I'm a bit busy right now. Please try again in a moment!")
                     
                 except Exception as e:
-                    log(f"❌ Error processing natural language: {e}", level="ERROR")
-                    await send_message(chat_id, 
-                        "I understand your message, but I'm having trouble processing it right now. "
-                        "Please try again!")
-                return {"ok": True}
+                    logger.error("❌ Error processing natural language: %s", e)
+                    await send_message(chat_id, NL_ERROR_TEXT)
         
         else:
             # Handle non-text messages
-            await send_message(chat_id, 
-                "I received your message! Currently I work best with text messages. "
-                "More features coming soon! 🚀")
+            await send_message(chat_id, NON_TEXT_TEXT)
             
     except Exception as e:
-        log(f"Error in webhook handler: {e}", level="ERROR")
+        logger.error("Error in webhook handler: %s", e)
         if chat_id:
             try:
                 await send_message(chat_id, 
                     "Sorry, I encountered an error. Please try again!")
             except:
                 pass
-    
-    # Always return success to Telegram
-    return {"ok": True}
 
 # (deprecated startup event removed in favor of lifespan)
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv('PORT', 10000))
-    log(f"Starting server on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Each worker runs the lifespan (webhook setup, reminder poller) and keeps its own
+    # in-memory link codes and caches, so stay on one process unless those are shared
+    workers = int(os.getenv('WEB_CONCURRENCY', 1))
+    logger.info(f"Starting server on port {port} ({workers} worker(s))")
+    # uvicorn needs an import string to spawn workers; with one, pass the app object so
+    # `python main.py` doesn't import this module (and its logging setup) a second time
+    uvicorn.run("main:app" if workers > 1 else app, host="0.0.0.0", port=port, loop="uvloop",
+                http="httptools", workers=workers, access_log=False)
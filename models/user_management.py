@@ -7,9 +7,16 @@ using Supabase.
 """
 
 import os
+import sys
+import atexit
+import functools
+import time
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from dataclasses import dataclass
 from supabase import create_client, Client
 
@@ -17,11 +24,12 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 load_dotenv()
 
-from core.encryption import encrypt_user_token, decrypt_user_token
+from core.encryption import encrypt_user_token, decrypt_user_token, forget_user_keys
+from core.retry import retry_db
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User data model."""
     user_id: str
@@ -32,10 +40,59 @@ class User:
     last_active: datetime
     is_active: bool = True
 
+@dataclass(slots=True, frozen=True)
+class UserRow:
+    """A users row as returned by get_user (timestamps stay ISO strings)."""
+    user_id: str
+    telegram_username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    created_at: Optional[str] = None
+    last_active: Optional[str] = None
+    is_active: bool = True
+
+# Python 3.11+ parses a trailing 'Z' (and any fraction length) natively
+_FROMISO_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+def _parse_iso(value: Optional[str]) -> datetime:
+    """Parse a Supabase timestamp; missing values fall back to now (UTC)."""
+    if not value:
+        return datetime.utcnow()
+    if not _FROMISO_ACCEPTS_Z and value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+# Columns read back into UserRow / User; avoids select('*') pulling anything added to the table later
+USER_COLUMNS = 'user_id,telegram_username,first_name,last_name,created_at,last_active,is_active'
+
+# Retries for queries a webhook is waiting on; background jobs keep retry_db's default
+REQUEST_RETRIES = 2
+
+# Cached in place of a row when the user_id has no active user
+_MISSING = object()
+
 class UserManager:
     """Manages user data and database operations using Supabase."""
     
+    # get_user results are served from memory for this long (seconds)
+    CACHE_TTL = 60
+    # Unknown user_ids are remembered as _MISSING for a shorter time
+    NEGATIVE_CACHE_TTL = 10
+    CACHE_MAX_ENTRIES = 10_000
+    
     def __init__(self):
+        # user_id -> (fetched_at, row or _MISSING); least recently used first
+        self._cache: "OrderedDict[str, tuple[float, UserRow]]" = OrderedDict()
+        # The a* methods run queries in worker threads, so cache updates are locked
+        self._cache_lock = threading.Lock()
+        # user_ids seen since the last flush_last_active()
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        # Cleared if the touch_users() function from supabase_schema.sql isn't installed
+        self._touch_rpc = True
+        # (method, user_id) -> in-flight lookup shared by concurrent a* callers (event loop only)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        
         self.supabase_url = os.getenv('SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_ANON_KEY')
         
@@ -90,7 +147,8 @@ class UserManager:
             }
             
             # Use upsert to handle both insert and update
-            result = self.supabase.table('users').upsert(user_data, on_conflict='user_id').execute()
+            result = retry_db(self.supabase.table('users').upsert(user_data, on_conflict='user_id').execute, max_retries=REQUEST_RETRIES)
+            self.invalidate(user_id)
             
             if result.data:
                 logger.info(f"✅ User {user_id} registered successfully")
@@ -103,55 +161,133 @@ class UserManager:
             logger.error(f"❌ Failed to register user {user_id}: {e}")
             return False
     
-    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user data by user ID."""
-        try:
-            result = self.supabase.table('users').select('*').eq('user_id', user_id).eq('is_active', True).execute()
-            
-            if not result.data:
+    def invalidate(self, user_id: str) -> None:
+        """Drop a user's cached row after it changes."""
+        with self._cache_lock:
+            self._cache.pop(user_id, None)
+    
+    def _cache_get(self, user_id: str):
+        """Return the cached row (or _MISSING) if it is still fresh, else None."""
+        with self._cache_lock:
+            cached = self._cache.get(user_id)
+            if cached is None:
                 return None
-            
-            row = result.data[0]
-            
-            # Return user data in clean format
-            return {
-                'user_id': row['user_id'],
-                'telegram_username': row.get('telegram_username'),
-                'first_name': row.get('first_name'),
-                'last_name': row.get('last_name'),
-                'created_at': row.get('created_at'),
-                'last_active': row.get('last_active'),
-                'is_active': bool(row.get('is_active', True))
-            }
-                
+            fetched_at, user = cached
+            ttl = self.NEGATIVE_CACHE_TTL if user is _MISSING else self.CACHE_TTL
+            if time.monotonic() - fetched_at < ttl:
+                self._cache.move_to_end(user_id)
+                return user
+            del self._cache[user_id]
+            return None
+    
+    def _cache_put(self, user_id: str, user) -> None:
+        with self._cache_lock:
+            self._cache[user_id] = (time.monotonic(), user)
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+    
+    def _fetch_user_uncached(self, user_id: str) -> Optional[UserRow]:
+        """Query Supabase for an active user; raises on client errors."""
+        result = retry_db(self.supabase.table('users').select(USER_COLUMNS).eq('user_id', user_id).eq('is_active', True).execute, max_retries=REQUEST_RETRIES)
+        
+        if not result.data:
+            return None
+        
+        row = result.data[0]
+        
+        # Frozen, so the cached instance can be handed out as-is
+        return UserRow(
+            user_id=row['user_id'],
+            telegram_username=row.get('telegram_username'),
+            first_name=row.get('first_name'),
+            last_name=row.get('last_name'),
+            created_at=row.get('created_at'),
+            last_active=row.get('last_active'),
+            is_active=bool(row.get('is_active', True))
+        )
+    
+    def get_user(self, user_id: str) -> Optional[UserRow]:
+        """Get user data by user ID (cached for CACHE_TTL seconds)."""
+        user = self._cache_get(user_id)
+        if user is not None:
+            return None if user is _MISSING else user
+        
+        try:
+            user = self._fetch_user_uncached(user_id)
         except Exception as e:
             logger.error(f"❌ Failed to get user {user_id}: {e}")
             return None
+        
+        # Misses are cached too, so unregistered senders don't cost a query per message
+        self._cache_put(user_id, _MISSING if user is None else user)
+        return user
     
     def update_last_active(self, user_id: str) -> bool:
-        """Update user's last active timestamp."""
+        """Mark the user active; the timestamp is written by the next flush_last_active()."""
+        with self._dirty_lock:
+            self._dirty.add(user_id)
+        return True
+    
+    def flush_last_active(self) -> int:
+        """Write last_active for every user marked since the last flush in one UPDATE."""
+        with self._dirty_lock:
+            if not self._dirty:
+                return 0
+            user_ids, self._dirty = list(self._dirty), set()
+        if not self.supabase:
+            return 0
+        
+        if self._touch_rpc:
+            try:
+                # last_active = now() on the database side
+                retry_db(self.supabase.rpc('touch_users', {'p_user_ids': user_ids}).execute)
+                return len(user_ids)
+            except Exception as e:
+                logger.warning(f"⚠️ touch_users() unavailable, stamping last_active client-side: {e}")
+                self._touch_rpc = False
+        
         try:
-            result = self.supabase.table('users').update({
+            retry_db(self.supabase.table('users').update({
                 'last_active': datetime.utcnow().isoformat()
-            }).eq('user_id', user_id).execute()
-            
-            return bool(result.data)
+            }).in_('user_id', user_ids).execute)
+            return len(user_ids)
                 
         except Exception as e:
-            logger.error(f"❌ Failed to update last active for user {user_id}: {e}")
-            return False
+            logger.error(f"❌ Failed to update last active for {len(user_ids)} users: {e}")
+            # Retry with the next flush
+            with self._dirty_lock:
+                self._dirty.update(user_ids)
+            return 0
     
     def is_user_registered(self, user_id: str) -> bool:
         """Check if a user is registered."""
-        user = self.get_user(user_id)
-        return user is not None and user.get('is_active', False)
+        # Only active users are cached as rows, so a fresh entry answers without a query
+        cached = self._cache_get(user_id)
+        if cached is not None:
+            return cached is not _MISSING
+        
+        try:
+            # HEAD request: PostgREST returns the count only, no row body
+            result = retry_db(self.supabase.table('users').select('user_id', count='exact', head=True)
+                              .eq('user_id', user_id).eq('is_active', True).execute,
+                              max_retries=REQUEST_RETRIES)
+            if not result.count:
+                self._cache_put(user_id, _MISSING)
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to check registration for user {user_id}: {e}")
+            return False
     
     def deactivate_user(self, user_id: str) -> bool:
         """Deactivate a user (soft delete)."""
         try:
-            result = self.supabase.table('users').update({
+            result = retry_db(self.supabase.table('users').update({
                 'is_active': False
-            }).eq('user_id', user_id).execute()
+            }).eq('user_id', user_id).execute, max_retries=REQUEST_RETRIES)
+            self.invalidate(user_id)
+            forget_user_keys()
             
             if result.data:
                 logger.info(f"✅ User {user_id} deactivated")
@@ -162,38 +298,102 @@ class UserManager:
             logger.error(f"❌ Failed to deactivate user {user_id}: {e}")
             return False
     
-    def get_all_active_users(self) -> List[User]:
-        """Get all active users."""
-        try:
-            result = self.supabase.table('users').select('*').eq('is_active', True).order('last_active', desc=True).execute()
+    # Async variants for the bot's event loop: supabase-py's client is synchronous,
+    # so each query runs in a worker thread instead of blocking other webhooks
+    async def aregister_user(self, user_id: str, telegram_username: Optional[str] = None,
+                             first_name: Optional[str] = None, last_name: Optional[str] = None) -> bool:
+        return await asyncio.to_thread(self.register_user, user_id, telegram_username, first_name, last_name)
+    
+    def _single_flight(self, fn, user_id: str) -> asyncio.Future:
+        """Run fn(user_id) in a thread once for all concurrent callers asking the same thing."""
+        key = (fn.__name__, user_id)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(fn, user_id))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the lookup for the others
+        return asyncio.shield(future)
+    
+    async def aget_user(self, user_id: str) -> Optional[UserRow]:
+        user = self._cache_get(user_id)
+        if user is not None:
+            return None if user is _MISSING else user
+        return await self._single_flight(self.get_user, user_id)
+    
+    async def aflush_last_active(self) -> int:
+        return await asyncio.to_thread(self.flush_last_active)
+    
+    async def ais_user_registered(self, user_id: str) -> bool:
+        cached = self._cache_get(user_id)
+        if cached is not None:
+            return cached is not _MISSING
+        return await self._single_flight(self.is_user_registered, user_id)
+    
+    def iter_active_user_rows(self, batch: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield active users as raw row dicts in user_id order, `batch` rows per query."""
+        # Keyset pagination on the immutable user_id: last_active is rewritten by the
+        # flusher while we scan, so ordering or offsetting by it would skip or repeat rows
+        if not self.supabase:
+            return
+        last_seen = None
+        while True:
+            query = self.supabase.table('users').select(USER_COLUMNS).eq('is_active', True)
+            if last_seen is not None:
+                query = query.gt('user_id', last_seen)
+            try:
+                result = retry_db(query.order('user_id').limit(batch).execute)
+            except Exception as e:
+                logger.error(f"❌ Failed to get active users: {e}")
+                return
             
-            users = []
-            for row in result.data:
-                users.append(User(
-                    user_id=row['user_id'],
-                    telegram_username=row.get('telegram_username'),
-                    first_name=row.get('first_name'),
-                    last_name=row.get('last_name'),
-                    created_at=datetime.fromisoformat(row['created_at'].replace('Z', '+00:00')) if row.get('created_at') else datetime.utcnow(),
-                    last_active=datetime.fromisoformat(row['last_active'].replace('Z', '+00:00')) if row.get('last_active') else datetime.utcnow(),
-                    is_active=bool(row.get('is_active', True))
-                ))
+            rows = result.data or []
+            yield from rows
             
-            return users
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to get active users: {e}")
-            return []
+            if len(rows) < batch:
+                return
+            last_seen = rows[-1]['user_id']
+    
+    def iter_active_users(self, batch: int = 500) -> Iterator[User]:
+        """Yield active users as User objects (timestamps parsed)."""
+        for row in self.iter_active_user_rows(batch):
+            yield User(
+                user_id=row['user_id'],
+                telegram_username=row.get('telegram_username'),
+                first_name=row.get('first_name'),
+                last_name=row.get('last_name'),
+                created_at=_parse_iso(row.get('created_at')),
+                last_active=_parse_iso(row.get('last_active')),
+                is_active=bool(row.get('is_active', True))
+            )
+    
+    def get_all_active_users_raw(self) -> List[Dict[str, Any]]:
+        """Get all active users as row dicts, skipping User construction and timestamp parsing."""
+        return list(self.iter_active_user_rows())
+    
+    def get_all_active_users(self) -> List[User]:
+        """Get all active users (prefer iterating iter_active_users())."""
+        return list(self.iter_active_users())
     
     def get_user_stats(self) -> Dict[str, Any]:
         """Get user statistics."""
+        try:
+            row = retry_db(self.supabase.rpc('user_stats').execute).data[0]
+            return {
+                'total_users': row['total'],
+                'active_users': row['active'],
+                'registered_users': row['active']
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ user_stats() unavailable, counting with two queries: {e}")
+        
         try:
             # Get total users
-            total_result = self.supabase.table('users').select('user_id', count='exact').execute()
+            total_result = retry_db(self.supabase.table('users').select('user_id', count='exact').execute)
             total_users = total_result.count or 0
             
             # Get active users  
-            active_result = self.supabase.table('users').select('user_id', count='exact').eq('is_active', True).execute()
+            active_result = retry_db(self.supabase.table('users').select('user_id', count='exact').eq('is_active', True).execute)
             active_users = active_result.count or 0
             
             return {
@@ -206,5 +406,23 @@ class UserManager:
             logger.error(f"❌ Failed to get user stats: {e}")
             return {'total_users': 0, 'active_users': 0, 'registered_users': 0}
 
-# Global user manager instance
-user_manager = UserManager()
+def _close_user_manager() -> None:
+    """Close the Supabase HTTP session at exit, if a manager was ever created."""
+    if get_user_manager.cache_info().currsize == 0:
+        return
+    client = get_user_manager().supabase
+    # postgrest is a lazy property; read the backing attribute so exit doesn't build a client
+    session = getattr(getattr(client, '_postgrest', None), 'session', None)
+    if session is not None:
+        try:
+            session.close()
+        except Exception:
+            pass
+
+# Shared user manager; nothing touches Supabase until the first call
+@functools.cache
+def get_user_manager() -> UserManager:
+    """Get global user manager instance."""
+    return UserManager()
+
+atexit.register(_close_user_manager)
@@ -15,6 +15,37 @@ CREATE TABLE IF NOT EXISTS users (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_active ON users(user_id, is_active);
 CREATE INDEX IF NOT EXISTS idx_users_last_active ON users(last_active DESC);
+-- Active-user listing pages by user_id (keyset) over active rows only; unlike the
+-- primary key it skips deactivated users
+CREATE INDEX IF NOT EXISTS idx_users_active_by_id ON users(user_id) WHERE is_active;
+
+-- Stamp last_active for a batch of users with the database clock
+CREATE OR REPLACE FUNCTION touch_users(p_user_ids TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+    touched INTEGER;
+BEGIN
+    UPDATE users
+    SET last_active = CURRENT_TIMESTAMP
+    WHERE user_id = ANY(p_user_ids);
+    
+    GET DIAGNOSTICS touched = ROW_COUNT;
+    RETURN touched;
+END;
+$$ LANGUAGE plpgsql;
+
+GRANT EXECUTE ON FUNCTION touch_users(TEXT[]) TO authenticated;
+GRANT EXECUTE ON FUNCTION touch_users(TEXT[]) TO anon;
+
+-- Total and active user counts in one round-trip
+CREATE OR REPLACE FUNCTION user_stats()
+RETURNS TABLE(total BIGINT, active BIGINT) AS $$
+    SELECT count(*), count(*) FILTER (WHERE is_active)
+    FROM users;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION user_stats() TO authenticated;
+GRANT EXECUTE ON FUNCTION user_stats() TO anon;
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;